@@ -5,14 +5,22 @@ Author: Hugo O. Rivera Calzadillas
 Fall 2013
 Resizable, py2/3 compatible, cross platform.
 """
+# pylint: disable=too-many-lines
+import argparse
 import logging
+import multiprocessing
 import os
 import platform
+import re
+import struct
 import subprocess
 import sys
+import threading
 import time
 import wave
 import webbrowser
+import zlib
+from collections import OrderedDict, deque, namedtuple
 from math import log
 
 # pylint: disable=no-name-in-module
@@ -26,11 +34,13 @@ except ImportError:
 
 # Try to maintain py3 compatibility
 if sys.version_info[0] <= 2:
+    import tkFont as tkfont
     import Tkinter as tk
-    from ConfigParser import ConfigParser
+    from ConfigParser import RawConfigParser
 else:
     import tkinter as tk
-    from configparser import ConfigParser
+    import tkinter.font as tkfont
+    from configparser import RawConfigParser
 
 PROJECT_URL = "https://github.com/roguh/suspenseful_random_number_picker"
 
@@ -43,7 +53,39 @@ CONFIG_FILENAME = ".suspenseful_random_number_picker.ini"
 BUTTON_FILENAME = absolutepath("red_button.ppm")
 WAV_SOUND_EFFECT_FILENAMES = {"tada": absolutepath("476340__nolhananas__tada.wav")}
 
-SHOW_RANDOM_DEBOUNCE_TIME_SEC = 0.5
+# Draws requested while a number is being unveiled wait in a queue.
+# When the queue is full, further presses are refused with a bell.
+DRAW_QUEUE_SIZE = 20
+# With this many draws waiting, unveil numbers as fast as possible
+DRAW_QUEUE_RUSH_SIZE = 3
+# Time the unveiled number stays on screen before the next queued draw
+DRAW_QUEUE_PAUSE_MS = 1500
+DRAW_QUEUE_RUSH_PAUSE_MS = 500
+# Holding a key repeats it. On X11 each repeat is a key release followed by
+# a key press at the same time, so a release only draws if no press follows
+# within this delay
+KEY_REPEAT_CHECK_MS = 20
+
+# Roulettes shown side by side in one window, keys 1 to 9 draw on each of them
+MAX_PANELS = 9
+# Roulettes other than the first only configure these keys
+PANEL_CONFIGURATION_KEYS = ["suspensefulness", "max_num", "min_num", "step_num"]
+# Interval of the animation timer shared by all roulettes
+ANIMATION_TICK_MS = 10
+
+# Draws remembered by each roulette's history, older ones are forgotten
+DRAW_HISTORY_SIZE = 1 << 20
+# Most recent draws listed in the history panel
+DRAW_HISTORY_SHOWN = 20
+
+# Animation timelines are memoised, keep the ones for recent draws
+ROLL_TIMELINE_CACHE_SIZE = 256
+
+# Width of the outline around each decimal place's rectangle
+RECT_OUTLINE = 10
+DIGIT_FONT_FAMILY = "Helvetica"
+# Digit layouts are cached per canvas size, keep the ones for recent sizes
+DIGIT_LAYOUT_CACHE_SIZE = 16
 
 IS_WINDOWS = os.name == "nt"
 
@@ -54,8 +96,51 @@ DEFAULT_MAIN_CONFIG = dict(
     step_num=1,
     always_configure_on_startup=True,
     play_sound_effect=True,
+    theme="classic",
+    # Name of the active profile, empty for none
+    profile="",
 )
-BOOLEAN_CONFIGURATION_KEYS = ["always_configure_on_startup", "play_sound_effect"]
+# Type of every key of the main_config section, what it must be, and a check
+CONFIGURATION_SCHEMA = OrderedDict(
+    [
+        ("suspensefulness", (int, "an integer >= 1", lambda value: value >= 1)),
+        ("max_num", (int, "an integer", None)),
+        ("min_num", (int, "an integer", None)),
+        ("step_num", (int, "an integer >= 1", lambda value: value >= 1)),
+        ("always_configure_on_startup", (bool, "true or false", None)),
+        ("play_sound_effect", (bool, "true or false", None)),
+        ("theme", (str, "a theme name", None)),
+        ("profile", (str, "a profile name", None)),
+    ]
+)
+BOOLEAN_VALUES = {
+    "1": True,
+    "yes": True,
+    "true": True,
+    "on": True,
+    "0": False,
+    "no": False,
+    "false": False,
+    "off": False,
+}
+# Profiles are defined in sections named profile:NAME. They may set any key
+# of the main_config section, except the profile.
+PROFILE_SECTION_PREFIX = "profile:"
+PROFILE_CONFIGURATION_KEYS = [key for key in CONFIGURATION_SCHEMA if key != "profile"]
+
+# Color schemes are defined in sections named theme:NAME
+THEME_SECTION_PREFIX = "theme:"
+THEME_COLOR_KEYS = [
+    "background",
+    "foreground",
+    "active_foreground",
+    "rect_fill",
+    "rect_outline",
+    "digit",
+]
+# Colors a theme may omit, they are derived from the other colors
+OPTIONAL_THEME_COLOR_KEYS = ["active_foreground", "rect_outline"]
+COLOR_PATTERN = re.compile(r"^#[0-9A-Fa-f]{6}$")
 
 logging.basicConfig(format="%(asctime)-15s %(levelname)-6s %(message)s")
 logger = logging.getLogger(__name__)
@@ -69,6 +154,71 @@ def get_configuration_filepath():
     return join(expanduser("~"), CONFIG_FILENAME)
 
 
+def get_panel_section(index):
+    # The first roulette uses the main_config section
+    return "roulette_%d" % (index + 1)
+
+
+def parse_configuration_value(key, text, section=None):
+    """Convert a configuration value to its type in CONFIGURATION_SCHEMA.
+
+    Raise ValueError with a message naming the key, and the section if given,
+    if it is invalid.
+    """
+    kind, expected, check = CONFIGURATION_SCHEMA[key]
+    text = text.strip()
+    try:
+        if kind is bool:
+            value = BOOLEAN_VALUES[text.lower()]
+        elif kind is int:
+            value = int(text)
+        else:
+            value = text
+        valid = check is None or check(value)
+    except (KeyError, ValueError):
+        valid = False
+    if not valid:
+        message = "%s must be %s, not %r" % (key, expected, text)
+        if section is not None:
+            message = "[%s] %s" % (section, message)
+        raise ValueError(message)
+    return value
+
+
+def set_ini_value(lines, section, key, value):
+    """Set one key in the lines of an INI file, leaving the other lines as they are.
+
+    Return the new lines. The key is added if missing, and the section too.
+    """
+    lines = list(lines)
+    header = "[%s]" % section
+    in_section = False
+    insert_at = None
+    for n, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("["):
+            if in_section:
+                break
+            in_section = stripped == header
+            if in_section:
+                insert_at = n + 1
+            continue
+        if not in_section or not stripped or stripped[0] in "#;":
+            continue
+        if re.split(r"[=:]", stripped, 1)[0].strip().lower() == key:
+            lines[n] = "%s = %s\n" % (key, value)
+            return lines
+        insert_at = n + 1
+
+    if insert_at is None:
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        lines.append("%s\n" % header)
+        insert_at = len(lines)
+    lines.insert(insert_at, "%s = %s\n" % (key, value))
+    return lines
+
+
 def subprocess_run(command):
     logger.info("Running shell command: %s", command)
     # pylint: disable=consider-using-with
@@ -82,6 +232,238 @@ def subprocess_run(command):
     )
 
 
+def pad_string(string, prefix, max_length):
+    # pads a string with some substring as a prefix
+    missing = max_length - len(string)
+    if missing > 0:
+        string = prefix * -(-missing // len(prefix)) + string
+    return string
+
+
+def complementary_color(hex_string, max_places=6, prefix="#"):
+    """Find the complementary color of a hex color string.
+
+    Handles prefixes and places.
+    """
+    # max color - color = complementary color
+    max_color = (1 << (4 * max_places)) - 1
+    comp = max_color - int(hex_string[len(prefix) :], 16)
+    return prefix + "%0*X" % (max_places, comp)
+
+
+Theme = namedtuple("Theme", ["name"] + THEME_COLOR_KEYS)
+
+
+def make_theme(name, colors):
+    """Validate a theme's colors and precompute the ones it omits.
+
+    colors - maps keys of THEME_COLOR_KEYS to "#RRGGBB" strings
+    active_foreground defaults to the foreground, and rect_outline to the
+    complementary color of rect_fill. Raise ValueError if a color is invalid.
+    """
+    values = {}
+    for key, value in colors.items():
+        if key not in THEME_COLOR_KEYS:
+            raise ValueError(
+                "Theme %s has an unknown color %s, use one of %s"
+                % (name, key, ", ".join(THEME_COLOR_KEYS))
+            )
+        if not COLOR_PATTERN.match(value.strip()):
+            raise ValueError(
+                "Theme %s: %s must be a color like #FF1717, not %r" % (name, key, value)
+            )
+        values[key] = value.strip().upper()
+
+    for key in THEME_COLOR_KEYS:
+        if key not in values and key not in OPTIONAL_THEME_COLOR_KEYS:
+            raise ValueError("Theme %s is missing the %s color" % (name, key))
+    values.setdefault("active_foreground", values["foreground"])
+    values.setdefault("rect_outline", complementary_color(values["rect_fill"]))
+    return Theme(name=name, **values)
+
+
+THEMES = OrderedDict(
+    (theme.name, theme)
+    for theme in [
+        make_theme(
+            "classic",
+            dict(
+                background="#FFFFFF",
+                foreground="#000000",
+                active_foreground="#BEBEBE",
+                rect_fill="#FF1717",
+                digit="#FFFFFF",
+            ),
+        ),
+        make_theme(
+            "night",
+            dict(
+                background="#000000",
+                foreground="#FFFFFF",
+                active_foreground="#808080",
+                rect_fill="#1A1A40",
+                rect_outline="#FFD700",
+                digit="#FFFFFF",
+            ),
+        ),
+    ]
+)
+
+
+def read_themes(config_object, errors):
+    """Return the built-in themes plus the valid themes of a configuration.
+
+    Also return the raw colors of every theme section, so they can be written
+    back as they were. Invalid themes are reported in errors.
+    """
+    themes = OrderedDict(THEMES)
+    theme_sections = OrderedDict()
+    for section in config_object.sections():
+        if not section.startswith(THEME_SECTION_PREFIX):
+            continue
+        name = section[len(THEME_SECTION_PREFIX) :].strip()
+        colors = OrderedDict(config_object.items(section))
+        theme_sections[section] = colors
+        try:
+            themes[name] = make_theme(name, colors)
+        except ValueError as error:
+            errors.append("[%s] is ignored: %s" % (section, error))
+    return themes, theme_sections
+
+
+def count_places(min_num, max_num):
+    """Count the decimal places (rectangles) needed to show any number in the range."""
+    # How many places? Make it an integer and give log a >0 value
+    mnum = max(abs(max_num), abs(min_num), 1)
+    num_places = int(log(mnum, 10)) + 1
+
+    # Make space for the dash
+    if min_num < 0 and int(log(abs(min_num), 10)) + 1 >= num_places:
+        num_places += 1
+    return num_places
+
+
+def place_rects(width, height, num_places):
+    """Compute the (x1, y1, x2, y2) rectangle of each decimal place.
+
+    The rectangles are centered on a canvas of the given size.
+    """
+    rect_w = width / float(num_places) - 5
+    rect_h = height - 2 * RECT_OUTLINE
+    rect_ox = width / 2.0 - (num_places * rect_w) / 2
+    rect_oy = 10
+    return [
+        (i * rect_w + rect_ox, rect_oy, (i + 1) * rect_w + rect_ox, rect_h + rect_oy)
+        for i in range(num_places)
+    ]
+
+
+def format_number(num, num_places):
+    """Pad num with zeroes to num_places characters, keeping its dash."""
+    # E.g., if max_num = 999, num = 99, ns = "099"
+    ns = pad_string(str(abs(num)), "0", num_places)
+    # Add the dash if it had one
+    if num < 0:
+        ns = "-" + ns[1:]
+    return ns
+
+
+class RollTimeline(
+    namedtuple("RollTimeline", ["places", "starts", "glyphs", "del_time"])
+):
+    """Immutable timeline of the rolling animation.
+
+    Places are listed least significant first, and the first one listed is
+    unveiled last. For the kth of them, places[k] is the index of its character
+    in the formatted number, 0 being the most significant, and glyphs[k][j] is
+    the character drawn del_time * (starts[k] + j) ms after the animation starts.
+    Each character stays until the next one is drawn. The last one is the
+    picked character and stays for good.
+    """
+
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        """Time at which the last place is unveiled, in ms."""
+        return max(
+            self.del_time * (start + len(glyphs) - 1)
+            for start, glyphs in zip(self.starts, self.glyphs)
+        )
+
+    def events(self, k):
+        """List the (time offset in ms, character) pairs of the kth place."""
+        start = self.starts[k]
+        return [
+            (self.del_time * (start + j), glyph)
+            for j, glyph in enumerate(self.glyphs[k])
+        ]
+
+    def glyph_index(self, k, time_ms):
+        """Index in glyphs[k] of the character shown at time_ms, -1 if none yet."""
+        j = int(time_ms // self.del_time) - self.starts[k]
+        return max(-1, min(j, len(self.glyphs[k]) - 1))
+
+    def frame(self, time_ms):
+        """Characters shown at time_ms, indexed like the formatted number.
+
+        A place with nothing shown yet is an empty string.
+        """
+        chars = [""] * len(self.places)
+        for k, place in enumerate(self.places):
+            j = self.glyph_index(k, time_ms)
+            if j >= 0:
+                chars[place] = self.glyphs[k][j]
+        return chars
+
+
+_roll_timeline_cache = OrderedDict()
+
+
+def roll_timeline(num, num_places, time_per_place):
+    """Compute the timeline of the rolling animation that unveils num.
+
+    Timelines are memoised, the same inputs always return the same timeline.
+    time_per_place - must be >0 and an integer
+    """
+    if time_per_place <= 0:
+        time_per_place = 1
+    time_per_place = int(time_per_place)
+
+    key = (num, num_places, time_per_place)
+    # Least recently used first. Pop and reinsert, move_to_end is py3 only
+    timeline = _roll_timeline_cache.pop(key, None)
+    if timeline is not None:
+        _roll_timeline_cache[key] = timeline
+        return timeline
+
+    ns = format_number(num, num_places)
+    places, starts, glyphs = [], [], []
+    for i in reversed(range(num_places)):
+        # Loop from 0 to 9 'count' times
+        count = (i + 1) * 3 + int(time_per_place / 2)
+        cc = ns[i]
+
+        if cc == "-":
+            picked_int = 0
+        else:
+            picked_int = int(cc)
+
+        places.append(i)
+        starts.append(count)
+        # Whiz through the digits, then settle on the picked character
+        glyphs.append("012345678" * count + "0123456789"[:picked_int] + cc)
+
+    # Characters are drawn every del_time ms
+    timeline = RollTimeline(
+        tuple(places), tuple(starts), tuple(glyphs), time_per_place * 5
+    )
+    _roll_timeline_cache[key] = timeline
+    if len(_roll_timeline_cache) > ROLL_TIMELINE_CACHE_SIZE:
+        _roll_timeline_cache.popitem(last=False)
+    return timeline
+
+
 class MainConfig(
     # Python 2 compatibility
     object
@@ -97,6 +479,10 @@ class MainConfig(
     step_num = DEFAULT_MAIN_CONFIG["step_num"]
     always_configure_on_startup = DEFAULT_MAIN_CONFIG["always_configure_on_startup"]
     play_sound_effect = DEFAULT_MAIN_CONFIG["play_sound_effect"]
+    # Name of the color scheme
+    theme = DEFAULT_MAIN_CONFIG["theme"]
+    # Name of the profile these values come from, empty for none
+    profile = DEFAULT_MAIN_CONFIG["profile"]
 
     def __setattr__(self, n, v):
         logger.debug("Setting configuration %s %s", n, v)
@@ -105,11 +491,124 @@ class MainConfig(
         super(MainConfig, self).__setattr__(n, v)
 
 
+class DrawHistory(
+    # Python 2 compatibility
+    object
+):  # pylint: disable=useless-object-inheritance
+    """The most recent draws of a roulette, kept in a ring buffer.
+
+    An index counts how many times each number is in the buffer, so appending
+    a draw and checking whether a number was drawn are both O(1).
+    """
+
+    def __init__(self, capacity=DRAW_HISTORY_SIZE):
+        self.capacity = capacity
+        # Grows up to capacity, then the oldest draws are overwritten.
+        # A list, not an array, so any integer fits
+        self.numbers = []
+        # Number of draws ever recorded
+        self.total = 0
+        # Drawn number -> [times drawn, serial number of its last draw]
+        self.index = {}
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __contains__(self, num):
+        return num in self.index
+
+    def append(self, num):
+        if len(self.numbers) < self.capacity:
+            self.numbers.append(num)
+        else:
+            slot = self.total % self.capacity
+            self._forget(self.numbers[slot])
+            self.numbers[slot] = num
+
+        entry = self.index.get(num)
+        if entry is None:
+            self.index[num] = [1, self.total]
+        else:
+            entry[0] += 1
+            entry[1] = self.total
+        self.total += 1
+
+    def _forget(self, num):
+        entry = self.index[num]
+        entry[0] -= 1
+        if entry[0] == 0:
+            del self.index[num]
+
+    def lookup(self, num):
+        """Return how many times num was drawn and the serial number of its last draw.
+
+        Serial numbers start at 1. Return None if num was not drawn.
+        """
+        entry = self.index.get(num)
+        if entry is None:
+            return None
+        return entry[0], entry[1] + 1
+
+    def last(self, n):
+        """Return up to n of the most recent draws, most recent first."""
+        return [
+            self.numbers[(self.total - 1 - k) % self.capacity]
+            for k in range(min(n, len(self.numbers)))
+        ]
+
+
+class DigitLayout(
+    # Python 2 compatibility
+    object
+):  # pylint: disable=useless-object-inheritance
+    """Font and positions for drawing digits on a canvas of a given size.
+
+    The font is sized using its real metrics so that every digit fits inside
+    its rectangle, whatever the shape of the window.
+    """
+
+    def __init__(self, master, width, height, num_places):
+        self.rects = place_rects(width, height, num_places)
+        x1, y1, x2, y2 = self.rects[0]
+        # Space left inside a rectangle once its outline is drawn
+        avail_w = max(1, x2 - x1 - 2 * RECT_OUTLINE)
+        avail_h = max(1, y2 - y1 - 2 * RECT_OUTLINE)
+
+        # Negative sizes are in pixels. Start from the historical size.
+        size = max(1, int(width / 3))
+        self.font = tkfont.Font(master, family=DIGIT_FONT_FAMILY, size=-size)
+        glyph_w = max(self.font.measure(c) for c in "0123456789-")
+        glyph_h = self.font.metrics("ascent")
+        scale = min(1.0, avail_w / float(glyph_w), avail_h / float(glyph_h))
+        if scale < 1.0:
+            size = max(1, int(size * scale))
+            self.font.configure(size=-size)
+
+        # Tk centers the whole line, descent included, on the text's position.
+        # Shift it down so the digits themselves are centered.
+        shift_y = self.font.metrics("descent") / 2.0
+        self.centers = [
+            ((x1 + x2) / 2.0, (y1 + y2) / 2.0 + shift_y)
+            for x1, y1, x2, y2 in self.rects
+        ]
+
+
 class AudioPlayer:
+    """Play sound effects through one output stream shared by all roulettes.
+
+    The stream is opened for the first sound and kept open, playing silence
+    between sounds. Playing a sound restarts it from the beginning.
+    """
+
     def __init__(self):
         self.pyaudio = None
         self.wavefiles = {}
         self.pyaudio_stream = None
+        # Sample width, channels and rate of the open stream
+        self.stream_params = None
+        self.playing = None
+        # The stream callback runs in another thread
+        self.lock = threading.Lock()
 
     def initialize_pyaudio(self):
         if pyaudio is not None:
@@ -118,58 +617,87 @@ class AudioPlayer:
         else:
             logger.warning("Unable to import the pyaudio library. Audio is disabled!")
 
-    def get_pyaudio_callback(self, audioname):
+    def get_pyaudio_callback(self):
         def callback(in_data, frame_count, time_info, status):
             if pyaudio is None:
                 return (None, 0)
-            data = self.wavefiles[audioname].readframes(frame_count)
+            sampwidth, channels, _ = self.stream_params
+            data = b""
+            with self.lock:
+                if self.playing is not None:
+                    data = self.playing.readframes(frame_count)
+                    if not data:
+                        self.playing = None
+            # Keep the stream running with silence
+            silence = b"\x80" if sampwidth == 1 else b"\x00"
+            data += silence * (frame_count * sampwidth * channels - len(data))
             return (data, pyaudio.paContinue)
 
         return callback
 
-    def stop_pyaudio_stream(self):
+    def close_stream(self):
         if self.pyaudio_stream is not None:
             self.pyaudio_stream.stop_stream()
             self.pyaudio_stream.close()
             self.pyaudio_stream = None
+            self.stream_params = None
 
-        for wavefile in self.wavefiles.values():
-            wavefile.close()
-        self.wavefiles = {}
+    def stop_pyaudio_stream(self):
+        self.close_stream()
+        with self.lock:
+            self.playing = None
+            for wavefile in self.wavefiles.values():
+                wavefile.close()
+            self.wavefiles = {}
+
+    def get_wavefile(self, audioname):
+        if audioname not in self.wavefiles:
+            filename = WAV_SOUND_EFFECT_FILENAMES[audioname]
+            try:
+                self.wavefiles[audioname] = wave.open(filename, "rb")
+            except OSError:
+                logger.warning("Could not open sound file %s", filename, exc_info=True)
+                return None
+        return self.wavefiles[audioname]
 
     def play_sound(self, audioname):
         if self.pyaudio is None:
             return
 
-        self.stop_pyaudio_stream()
-        if audioname in self.wavefiles:
-            self.wavefiles[audioname].close()
-
-        filename = WAV_SOUND_EFFECT_FILENAMES[audioname]
-        try:
-            self.wavefiles[audioname] = wave.open(filename, "rb")
-        except OSError:
-            logger.warning("Could not open sound file %s", filename, exc_info=True)
+        wavefile = self.get_wavefile(audioname)
+        if wavefile is None:
             return
 
-        self.pyaudio_stream = self.pyaudio.open(
-            format=self.pyaudio.get_format_from_width(
-                self.wavefiles[audioname].getsampwidth()
-            ),
-            channels=self.wavefiles[audioname].getnchannels(),
-            rate=self.wavefiles[audioname].getframerate(),
-            output=True,
-            stream_callback=self.get_pyaudio_callback(audioname),
+        params = (
+            wavefile.getsampwidth(),
+            wavefile.getnchannels(),
+            wavefile.getframerate(),
         )
-
-        self.pyaudio_stream.start_stream()
+        # Only reopen the stream if this sound needs a different format
+        if self.pyaudio_stream is not None and params != self.stream_params:
+            self.close_stream()
+
+        with self.lock:
+            wavefile.rewind()
+            self.playing = wavefile
+
+        if self.pyaudio_stream is None:
+            self.stream_params = params
+            self.pyaudio_stream = self.pyaudio.open(
+                format=self.pyaudio.get_format_from_width(params[0]),
+                channels=params[1],
+                rate=params[2],
+                output=True,
+                stream_callback=self.get_pyaudio_callback(),
+            )
+            self.pyaudio_stream.start_stream()
 
     def terminate(self):
         if self.pyaudio:
             self.pyaudio.terminate()
 
 
-class Roulette_UI(tk.Tk):
+class Roulette_UI(tk.Tk):  # pylint: disable=too-many-public-methods
     def __init__(self, title, master=None):
         """Create a tkinter window.
 
@@ -180,147 +708,320 @@ class Roulette_UI(tk.Tk):
         self.resizable(height=True, width=True)
         self.title(title)
 
-        self.tk_setPalette(
-            background="white",
-            foreground="black",
-            activeBackground="white",
-            activeForeground="gray",
-        )
+        # Built-in themes, and the ones defined in the configuration file
+        self.themes = OrderedDict(THEMES)
+        # Theme sections as read from the file, written back unchanged
+        self.theme_sections = OrderedDict()
+        self.theme = THEMES[DEFAULT_MAIN_CONFIG["theme"]]
         # Initial configuration values.
         # Avoid reading or writing to the configuration in the __init__ to make
         # unit testing and REPL stuff easier.
+        # The main configuration holds the global options and the settings of
+        # the first roulette.
         self.main_config = MainConfig()
-        # We'll likely never use this non-random number, but this attribute
-        # must be initialized
-        self.num = self.main_config.min_num
-        self.range = self.make_range()
+        # The main_config section as loaded, and the profiles that override it
+        self.base_config = dict(DEFAULT_MAIN_CONFIG)
+        self.profiles = OrderedDict()
+        self.configuration_errors = []
 
-        self.f = tk.Frame(self, bg="white")
+        self.audio_player = AudioPlayer()
+        # All roulettes share a single animation timer
+        self.animation_timer = None
+        # Key symbol -> (timer of its pending action, time of the release)
+        self.key_release_timers = {}
+        self.panels = []
+        self.apply_theme(self.theme)
+
+        self.f = tk.Frame(self)
         self.f.pack(fill=tk.BOTH, expand=1)
         self._define_elements(self.f)
+        self.active_panel = self.add_panel(self.main_config)
 
         # Handle various types of exit events
         self.protocol("WM_DELETE_WINDOW", self.tk_quit)
         self.bind("<Escape>", self.tk_quit)
         self.bind("<Control-c>", self.tk_quit)
         # https://tkdocs.com/shipman/key-names.html
-        self.bind("<KeyRelease-space>", self.show_random)
-        self.bind("<KeyRelease-Return>", self.show_random)
-        self.bind("<KeyRelease-KP_Enter>", self.show_random)
+        for key in ["space", "Return", "KP_Enter"]:
+            self.bind_key_release(key, self.show_random)
         self.bind("<KeyRelease-F1>", self.show_help)
+        for n in range(1, MAX_PANELS + 1):
+            self.bind_key_release(
+                str(n), lambda index=n - 1: self.show_random_on_panel(index)
+            )
 
-        # Used to calculate a nice color scheme.
-        self.button_fg = "#FF1717"
-        self.button_bg = "#FFFFFF"
-
-        self.last_show_random_time = 0
-        self.audio_player = AudioPlayer()
+    def bind_key_release(self, key, action):
+        """Call action when key is released, once even if the key is held down."""
+        self.bind(
+            "<KeyRelease-%s>" % key,
+            lambda event: self.on_key_release(event, action),
+        )
+        self.bind("<KeyPress-%s>" % key, self.on_key_press)
 
-    def make_range(self):
-        return list(
-            range(
-                self.main_config.min_num,
-                self.main_config.max_num,
-                self.main_config.step_num,
-            )
+    def on_key_release(self, event, action):
+        timer = self.after(
+            KEY_REPEAT_CHECK_MS, self.key_released, event.keysym, event.time, action
         )
+        self.key_release_timers[event.keysym] = (timer, event.time)
+
+    def on_key_press(self, event):
+        pending = self.key_release_timers.get(event.keysym)
+        if pending is not None and pending[1] == event.time:
+            # Autorepeat, the key is still held down
+            self.after_cancel(pending[0])
+            del self.key_release_timers[event.keysym]
+
+    def key_released(self, keysym, time_ms, action):
+        # A quick second release of the key may have replaced this one
+        if self.key_release_timers.get(keysym, (None, None))[1] == time_ms:
+            del self.key_release_timers[keysym]
+        action()
 
     def load_configuration(self):
-        # Load and convert values
-        # Check that all necessary keys are present in the loaded config
-        # Set configuration keys to default values if they are missing or not integers
-        logger.info("Loading configuration from %s", repr(get_configuration_filepath()))
-        defaults_loaded = False
-        config_object = ConfigParser()
+        """Read and validate the configuration file, once.
 
+        Invalid values are reported and replaced by their defaults. The file is
+        left untouched so it can be fixed, it is only written if it is missing.
+        Return whether the user should be asked for the configuration.
+        """
+        filepath = get_configuration_filepath()
+        logger.info("Loading configuration from %s", repr(filepath))
+        errors = []
+        # No interpolation, values may contain a %
+        config_object = RawConfigParser()
         try:
-            config_object.read(get_configuration_filepath())
-
-            # This code will raise an exception if a section is missing
-            main_config = {}
-            for key, default_value in DEFAULT_MAIN_CONFIG.items():
-                if config_object.has_option("main_config", key):
-                    if key in BOOLEAN_CONFIGURATION_KEYS:
-                        main_config[key] = config_object.getboolean("main_config", key)
-                    else:
-                        main_config[key] = config_object.getint("main_config", key)
-                else:
-                    logger.info(
-                        "Configuration missing key %s, setting to default value %s",
-                        key,
-                        default_value,
-                    )
-                    main_config[key] = default_value
-        except Exception:  # pylint: disable=broad-except
-            logger.info(
-                "Configuration error encountered. Loading default configuration values.",
-                exc_info=True,
+            config_object.read(filepath)
+        except Exception as error:  # pylint: disable=broad-except
+            errors.append("Could not read the configuration: %s" % error)
+            config_object = RawConfigParser()
+
+        file_missing = not exists(filepath)
+        if not file_missing and not config_object.has_section("main_config"):
+            errors.append("The [main_config] section is missing")
+
+        base_config = dict(DEFAULT_MAIN_CONFIG)
+        base_config.update(
+            self._read_section(
+                config_object, "main_config", CONFIGURATION_SCHEMA, errors
             )
-            main_config = DEFAULT_MAIN_CONFIG
-            defaults_loaded = True
+        )
 
-        self.set_configuration_values(main_config)
+        self.profiles = OrderedDict()
+        for section in config_object.sections():
+            if section.startswith(PROFILE_SECTION_PREFIX):
+                name = section[len(PROFILE_SECTION_PREFIX) :].strip()
+                self.profiles[name] = self._read_section(
+                    config_object, section, PROFILE_CONFIGURATION_KEYS, errors
+                )
+        if base_config["profile"] and base_config["profile"] not in self.profiles:
+            errors.append(
+                "[main_config] profile %s has no [%s%s] section"
+                % (
+                    base_config["profile"],
+                    PROFILE_SECTION_PREFIX,
+                    base_config["profile"],
+                )
+            )
+            base_config["profile"] = ""
+
+        self.load_themes(config_object, errors)
+        self._check_theme_names(base_config, "main_config", errors)
+        for name, values in self.profiles.items():
+            self._check_theme_names(values, PROFILE_SECTION_PREFIX + name, errors)
+
+        # Every other roulette has its own section
+        panel_configs = []
+        while len(panel_configs) + 1 < MAX_PANELS:
+            section = get_panel_section(len(panel_configs) + 1)
+            if not config_object.has_section(section):
+                break
+            values = dict(
+                (key, DEFAULT_MAIN_CONFIG[key]) for key in PANEL_CONFIGURATION_KEYS
+            )
+            values.update(
+                self._read_section(
+                    config_object, section, PANEL_CONFIGURATION_KEYS, errors
+                )
+            )
+            panel_configs.append(values)
 
-        self.write_configuration()
-        return defaults_loaded
+        for error in errors:
+            logger.warning("Configuration error: %s", error)
+        self.configuration_errors = errors
 
-    def set_configuration_values(self, main_config=None):
-        if main_config is None:
-            self.main_config = MainConfig()
-        else:
-            self.main_config.suspensefulness = main_config["suspensefulness"]
-            self.main_config.max_num = main_config["max_num"]
-            self.main_config.min_num = main_config["min_num"]
-            self.main_config.step_num = main_config["step_num"]
-            self.main_config.always_configure_on_startup = main_config[
-                "always_configure_on_startup"
-            ]
-            self.main_config.play_sound_effect = main_config["play_sound_effect"]
+        self.base_config = base_config
+        self.set_configuration_values(
+            self.get_profile_configuration(base_config["profile"]), panel_configs
+        )
 
-        self.main_config.max_num = max(
-            self.main_config.max_num, self.main_config.min_num
+        if file_missing:
+            self.write_configuration()
+        return file_missing or bool(errors)
+
+    def _read_section(self, config_object, section, keys, errors):
+        # Only return the valid values, report the others in errors
+        values = {}
+        if not config_object.has_section(section):
+            return values
+        for key, text in config_object.items(section):
+            if key not in keys:
+                errors.append(
+                    "[%s] has an unknown key %s, use one of %s"
+                    % (section, key, ", ".join(keys))
+                )
+                continue
+            try:
+                values[key] = parse_configuration_value(key, text, section)
+            except ValueError as error:
+                errors.append(str(error))
+        return values
+
+    def load_themes(self, config_object, errors):
+        """Validate the themes defined in the configuration, once."""
+        self.themes, self.theme_sections = read_themes(config_object, errors)
+
+    def _check_theme_names(self, values, section, errors):
+        # Unknown themes are reported and dropped, so the default is used
+        name = values.get("theme")
+        if name is None or name in self.themes:
+            return
+        errors.append(
+            "[%s] theme %s is not defined, use one of %s"
+            % (section, name, ", ".join(self.themes))
         )
-        self.main_config.min_num = min(
-            self.main_config.max_num, self.main_config.min_num
+        if section == "main_config":
+            values["theme"] = DEFAULT_MAIN_CONFIG["theme"]
+        else:
+            del values["theme"]
+
+    def get_profile_configuration(self, name):
+        # A profile overrides the values of the main configuration
+        values = dict(self.base_config)
+        if name:
+            values.update(self.profiles[name])
+        values["profile"] = name
+        return values
+
+    def get_current_configuration(self):
+        return dict(
+            (key, getattr(self.main_config, key)) for key in CONFIGURATION_SCHEMA
         )
 
-        self.range = self.make_range()
+    def set_configuration_values(self, main_config=None, panel_configs=()):
+        if main_config is None:
+            main_config = DEFAULT_MAIN_CONFIG
+        self.apply_main_config(main_config)
+
+        # Recreate the extra roulettes
+        while len(self.panels) > 1:
+            self.remove_panel()
+        for values in panel_configs:
+            panel_config = MainConfig()
+            for key in PANEL_CONFIGURATION_KEYS:
+                setattr(panel_config, key, values[key])
+            self.add_panel(panel_config)
+        # Themes and profiles may have changed
+        self._define_menu()
+
+    def apply_main_config(self, main_config):
+        for key in CONFIGURATION_SCHEMA:
+            setattr(self.main_config, key, main_config[key])
+        self.panels[0].set_main_config(self.main_config)
+        self.set_theme(self.main_config.theme)
 
         self.user_wants_always_configure_on_startup.set(
             int(self.main_config.always_configure_on_startup)
         )
         self.user_wants_play_sound_effect.set(int(self.main_config.play_sound_effect))
+        self.user_profile.set(self.main_config.profile)
 
     def write_configuration(self):
-        config_object = ConfigParser()
-        main_config = dict(
-            suspensefulness=str(self.main_config.suspensefulness),
-            max_num=str(self.main_config.max_num),
-            min_num=str(self.main_config.min_num),
-            step_num=str(self.main_config.step_num),
-            always_configure_on_startup=str(
-                self.main_config.always_configure_on_startup
-            ),
-            play_sound_effect=str(self.main_config.play_sound_effect),
+        config_object = RawConfigParser()
+        current = self.get_current_configuration()
+        profile = current["profile"]
+        if profile:
+            # Changes go to the active profile, the main configuration only selects it.
+            # The profile keeps overriding the same keys, plus the changed ones.
+            loaded = self.get_profile_configuration(profile)
+            overrides = self.profiles[profile]
+            for key in PROFILE_CONFIGURATION_KEYS:
+                if key in overrides or current[key] != loaded[key]:
+                    overrides[key] = current[key]
+            self.base_config["profile"] = profile
+        else:
+            self.base_config = current
+
+        config_object.add_section("main_config")
+        for name in CONFIGURATION_SCHEMA:
+            config_object.set("main_config", name, str(self.base_config[name]))
+
+        for name, values in self.profiles.items():
+            section = PROFILE_SECTION_PREFIX + name
+            config_object.add_section(section)
+            for key, value in values.items():
+                config_object.set(section, key, str(value))
+
+        for index, panel in enumerate(self.panels[1:], 1):
+            section = get_panel_section(index)
+            config_object.add_section(section)
+            for name in PANEL_CONFIGURATION_KEYS:
+                config_object.set(section, name, str(getattr(panel.main_config, name)))
+
+        for section, colors in self.theme_sections.items():
+            config_object.add_section(section)
+            for name, value in colors.items():
+                config_object.set(section, name, value)
+
+        logger.info(
+            "Saving configuration %s, profile %s and %s more roulettes",
+            self.base_config,
+            repr(profile),
+            len(self.panels) - 1,
         )
-        if not config_object.has_section("main_config"):
-            config_object.add_section("main_config")
-        for name, value in main_config.items():
-            config_object.set("main_config", name, value)
+        self.save_configuration_file(config_object.write)
 
+    def save_configuration_file(self, write):
+        """Call write with the configuration file, opened for writing."""
         try:
             if exists(get_configuration_filepath()) and IS_WINDOWS:
                 subprocess_run(["attrib", "-h", get_configuration_filepath()])
 
             with open(get_configuration_filepath(), "w") as configfile:
-                logger.info("Saving configuration %s", main_config)
-                config_object.write(configfile)
+                write(configfile)
 
             if exists(get_configuration_filepath()) and IS_WINDOWS:
                 subprocess_run(["attrib", "+h", get_configuration_filepath()])
         except Exception:  # pylint: disable=broad-except
             logger.error("Configuration file writing failed", exc_info=True)
 
+    def set_profile(self, name):
+        """Switch to a profile, or back to the main configuration if name is empty.
+
+        Profiles were validated when the configuration was loaded. Switching
+        only updates the profile key of the file, the rest is left untouched.
+        """
+        if name and name not in self.profiles:
+            logger.warning("Unknown profile %s", name)
+            return
+        logger.info("Switching to profile %s", repr(name))
+        self.base_config["profile"] = name
+        self.apply_main_config(self.get_profile_configuration(name))
+
+        if not exists(get_configuration_filepath()):
+            self.write_configuration()
+            return
+        try:
+            with open(get_configuration_filepath()) as configfile:
+                lines = configfile.readlines()
+        except OSError:
+            logger.error("Configuration file reading failed", exc_info=True)
+            return
+        lines = set_ini_value(lines, "main_config", "profile", name)
+        self.save_configuration_file(lambda configfile: configfile.writelines(lines))
+
+    def set_profile_from_menu(self):
+        self.set_profile(self.user_profile.get())
+
     def reset_configuration_and_show_random(self):
         self.reset_configuration()
         self.show_random()
@@ -333,10 +1034,20 @@ class Roulette_UI(tk.Tk):
         """First run. Start with the default range, ask for another range."""
         try:
             defaults_loaded = self.load_configuration()
-            self.pick_random_number()
+            if self.configuration_errors:
+                Message(
+                    self,
+                    "Configuration errors",
+                    "\n".join(self.configuration_errors)
+                    + "\n\nDefault values are used instead. Fix the file %s."
+                    % get_configuration_filepath(),
+                )
+            for panel in self.panels:
+                panel.num = panel.pick_random_number()
             if defaults_loaded or self.main_config.always_configure_on_startup:
-                self.range_ask()
-                self.num_ask()
+                for panel in self.panels:
+                    panel.range_ask()
+                    panel.num_ask()
                 # ONLY ROLL IF THERE WERE CHANGES
                 # self.show_random()
             self.audio_player.initialize_pyaudio()
@@ -362,29 +1073,128 @@ class Roulette_UI(tk.Tk):
         if self.main_config.play_sound_effect:
             self.audio_player.play_sound("tada")
 
+    def set_theme(self, name):
+        theme = self.themes.get(name)
+        if theme is None:
+            logger.warning(
+                "Unknown theme %s, using %s", name, DEFAULT_MAIN_CONFIG["theme"]
+            )
+            theme = THEMES[DEFAULT_MAIN_CONFIG["theme"]]
+        self.main_config.theme = theme.name
+        self.user_theme.set(theme.name)
+        if theme != self.theme:
+            self.apply_theme(theme)
+
+    def set_theme_from_menu(self):
+        self.set_theme(self.user_theme.get())
+        self.write_configuration()
+
+    def apply_theme(self, theme):
+        """Recolor the window and the roulettes without redrawing them."""
+        self.theme = theme
+        self.tk_setPalette(
+            background=theme.background,
+            foreground=theme.foreground,
+            activeBackground=theme.background,
+            activeForeground=theme.active_foreground,
+        )
+        for panel in self.panels:
+            panel.apply_theme(theme)
+
+    def set_show_history(self):
+        for panel in self.panels:
+            panel.show_history(self.user_wants_show_history.get())
+
     def _define_elements(self, frame):
         # Make a menu on the top bar with a single button that makes a dropdown menu
         self.top_menu = tk.Menu(frame)
 
         self.drop_menu = tk.Menu(frame, tearoff=0)
-        self.drop_menu.add_command(label="Change Range", command=self.range_ask)
-        self.drop_menu.add_command(label="Picking speed", command=self.num_ask)
-        self.drop_menu.add_separator()
-
         # Thanks, Shipman
         # https://tkdocs.com/shipman/checkbutton.html
         self.user_wants_always_configure_on_startup = tk.IntVar(self)
+        self.user_wants_play_sound_effect = tk.IntVar(self)
+        self.user_wants_show_history = tk.IntVar(self)
+        self.user_theme = tk.StringVar(self, value=self.theme.name)
+        self.theme_menu = tk.Menu(self.drop_menu, tearoff=0)
+        self.user_profile = tk.StringVar(self, value="")
+        self.profile_menu = tk.Menu(self.drop_menu, tearoff=0)
+
+        self.top_menu.add_cascade(label="Menu", menu=self.drop_menu)
+        # Hope 'self' extends 'tkinter.Tk()'
+        self.config(menu=self.top_menu)
+
+        # Roulettes are placed side by side in this frame
+        self.panels_frame = frame
+
+        # Load the button image once, all roulettes use it
+        try:
+            with open(BUTTON_FILENAME, "rb") as buttonfile:
+                self.but_image = tk.PhotoImage(
+                    name=BUTTON_FILENAME, data=buttonfile.read()
+                )
+        except OSError:
+            logger.warning(
+                "Could not open button file %s", BUTTON_FILENAME, exc_info=True
+            )
+            self.but_image = None
+
+    def _define_menu(self):
+        # The menu lists the roulettes, rebuild it whenever they change
+        self.drop_menu.delete(0, tk.END)
+        for panel in self.panels:
+            if len(self.panels) == 1:
+                menu = self.drop_menu
+            else:
+                menu = tk.Menu(self.drop_menu, tearoff=0)
+                self.drop_menu.add_cascade(label=panel.name, menu=menu)
+            menu.add_command(label="Change Range", command=panel.range_ask)
+            menu.add_command(label="Picking speed", command=panel.num_ask)
+        self.drop_menu.add_command(
+            label="Add roulette",
+            command=self.add_panel_and_show_random,
+            state=tk.NORMAL if len(self.panels) < MAX_PANELS else tk.DISABLED,
+        )
+        self.drop_menu.add_command(
+            label="Remove roulette",
+            command=self.remove_panel_and_write_configuration,
+            state=tk.NORMAL if len(self.panels) > 1 else tk.DISABLED,
+        )
+        self.drop_menu.add_separator()
+
         self.drop_menu.add_checkbutton(
             label="Always ask on startup?",
             variable=self.user_wants_always_configure_on_startup,
             command=self.set_always_configure_on_startup,
         )
-        self.user_wants_play_sound_effect = tk.IntVar(self)
         self.drop_menu.add_checkbutton(
             label="Play sound effect?",
             variable=self.user_wants_play_sound_effect,
             command=self.set_play_sound_effect,
         )
+        self.drop_menu.add_checkbutton(
+            label="Show draw history?",
+            variable=self.user_wants_show_history,
+            command=self.set_show_history,
+        )
+        self.drop_menu.add_cascade(label="Profile", menu=self.profile_menu)
+        self.profile_menu.delete(0, tk.END)
+        for name in [""] + list(self.profiles):
+            self.profile_menu.add_radiobutton(
+                label=name or "(none)",
+                value=name,
+                variable=self.user_profile,
+                command=self.set_profile_from_menu,
+            )
+        self.drop_menu.add_cascade(label="Theme", menu=self.theme_menu)
+        self.theme_menu.delete(0, tk.END)
+        for name in self.themes:
+            self.theme_menu.add_radiobutton(
+                label=name,
+                value=name,
+                variable=self.user_theme,
+                command=self.set_theme_from_menu,
+            )
         self.drop_menu.add_command(
             label="Reset configuration",
             command=self.reset_configuration_and_show_random,
@@ -395,44 +1205,50 @@ class Roulette_UI(tk.Tk):
         self.drop_menu.add_separator()
         self.drop_menu.add_command(label="Quit", command=self.tk_quit)
 
-        self.top_menu.add_cascade(label="Menu", menu=self.drop_menu)
-        # Hope 'self' extends 'tkinter.Tk()'
-        self.config(menu=self.top_menu)
-
-        # Create canvas frame for drawing numbers and a wrapper frame for it.
-        self.num_frame = tk.Frame(frame)
-        self.num_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-
-        self.num_canvas = tk.Canvas(self.num_frame)
-        self.num_canvas.pack(fill=tk.BOTH, expand=True)
-        self.num_canvas.bind("<Configure>", self.roll_nums)
-
-        self.num_canvas_width = int(self.num_canvas.cget("width"))
-        self.num_canvas_height = int(self.num_canvas.cget("height"))
-
-        self.canvas_rects = []
-        self.canvas_digits = []
-        self.canvas_queue = []
+    def add_panel(self, main_config):
+        panel = RoulettePanel(
+            self.panels_frame, self, "Roulette %d" % (len(self.panels) + 1), main_config
+        )
+        panel.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        panel.show_history(self.user_wants_show_history.get())
+        self.panels.append(panel)
+        self._define_menu()
+        return panel
+
+    def remove_panel(self):
+        panel = self.panels.pop()
+        panel.stop()
+        panel.destroy()
+        if self.active_panel is panel:
+            self.active_panel = self.panels[0]
+        self._define_menu()
+
+    def add_panel_and_show_random(self):
+        panel = self.add_panel(MainConfig())
+        self.write_configuration()
+        panel.range_ask()
+        panel.num_ask()
+        panel.show_random()
 
-        # Create button to start shuffling
-        try:
-            with open(BUTTON_FILENAME, "rb") as buttonfile:
-                self.but_image = tk.PhotoImage(
-                    name=BUTTON_FILENAME, data=buttonfile.read()
-                )
-        except OSError:
-            logger.warning(
-                "Could not open button file %s", BUTTON_FILENAME, exc_info=True
-            )
-            self.but_image = None
+    def remove_panel_and_write_configuration(self):
+        if len(self.panels) > 1:
+            self.remove_panel()
+            self.write_configuration()
 
-        self.but_go = tk.Button(
-            frame,
-            text="GET",
-            image=self.but_image,
-            command=self.show_random,
-        )
-        self.but_go.pack(expand=False)
+    def start_animation_tick(self):
+        if self.animation_timer is None:
+            self.animation_timer = self.after(ANIMATION_TICK_MS, self.animation_tick)
+
+    def animation_tick(self):
+        """Advance the animation of every roulette, as long as one is unveiling."""
+        self.animation_timer = None
+        now = time.time()
+        animating = False
+        for panel in self.panels:
+            # Tick every panel, even once one of them is known to be animating
+            animating = panel.animation_tick(now) or animating
+        if animating:
+            self.start_animation_tick()
 
     def tk_quit(self, event=None):
         """Close the entire window."""
@@ -456,39 +1272,198 @@ class Roulette_UI(tk.Tk):
             self,
             "Help",
             "To draw a new random number: press ENTER or SPACE, or click the button below the numbers.\n\n"
+            "Drawing again while a number is being unveiled queues the new draw. Queued numbers are unveiled in order, faster when many are waiting.\n\n"
+            "Each roulette remembers its draws. Show the draw history via the menu to list the last draws and check whether a number was already drawn.\n\n"
+            "Profiles hold presets for different events. Add a [profile:NAME] section to the configuration file with the keys to override, like min_num or theme, and pick it via the menu. Changes are then saved to the profile.\n\n"
+            "Color themes can be picked via the menu. To add your own, add a [theme:NAME] section to the configuration file with #RRGGBB colors for %s. Restart to load it.\n\n"
+            "Several roulettes, each with its own range and speed, can be added via the menu. ENTER and SPACE draw on the roulette whose button was last clicked. Press 1 to 9 to draw on a given roulette.\n\n"
             "This tool will select a random integer between the selected minimum and the selected maximum minus one, in steps of 1 or of a given number.\n\n"
             "Configuration is saved in an INI file and can be reset via the menu. It is saved whenever you make any changes to the program's parameters. Check the file %s if you want to see the configuration."
-            % get_configuration_filepath(),
+            % (", ".join(THEME_COLOR_KEYS), get_configuration_filepath()),
+        )
+
+    def show_random(self, event=None):
+        self.active_panel.show_random()
+
+    def show_random_on_panel(self, index):
+        if index < len(self.panels):
+            self.panels[index].show_random()
+
+
+class RoulettePanel(tk.Frame):  # pylint: disable=too-many-ancestors
+    def __init__(self, master, ui, name, main_config):
+        """Create a roulette: a canvas for the numbers and a button below it.
+
+        ui - the Roulette_UI window, which owns the sound and animation timer
+        main_config - the MainConfig with this roulette's range and speed
+        """
+        tk.Frame.__init__(self, master)
+        self.ui = ui
+        self.name = name
+        self.set_main_config(main_config)
+        # We'll likely never use this non-random number, but this attribute
+        # must be initialized
+        self.num = self.main_config.min_num
+
+        self.draw_queue = deque()
+        self.drawing = False
+        # Whether the number being unveiled was added to the history
+        self.recorded = False
+        self.history = DrawHistory()
+        self.pause_timer = None
+        # Timeline of the running animation, None when idle
+        self.timeline = None
+        self.shown = []
+        self.animation_start = 0
+
+        self._define_elements(self)
+
+    def _define_elements(self, frame):
+        # Create canvas frame for drawing numbers and a wrapper frame for it.
+        self.num_frame = tk.Frame(frame)
+        self.num_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+        self.num_canvas = tk.Canvas(self.num_frame)
+        self.num_canvas.pack(fill=tk.BOTH, expand=True)
+        self.num_canvas.bind("<Configure>", self.roll_nums)
+
+        self.num_canvas_width = int(self.num_canvas.cget("width"))
+        self.num_canvas_height = int(self.num_canvas.cget("height"))
+
+        self.canvas_rects = []
+        self.canvas_digits = []
+        self.digit_layouts = OrderedDict()
+
+        # Create button to start shuffling
+        self.but_go = tk.Button(
+            frame,
+            text="GET",
+            image=self.ui.but_image,
+            command=self.show_random,
+        )
+        self.but_go.pack(expand=False)
+
+        self._define_history(frame)
+
+    def _define_history(self, frame):
+        # Hidden until the history is shown via the menu
+        self.history_frame = tk.Frame(frame)
+
+        query_frame = tk.Frame(self.history_frame)
+        query_frame.pack(side=tk.TOP, fill=tk.X)
+        tk.Label(query_frame, text="Drawn?").pack(side=tk.LEFT)
+        self.history_query = tk.Entry(query_frame, width=10)
+        self.history_query.pack(side=tk.LEFT)
+        # Look the number up while typing. Drop the window from the bindtags so
+        # no key typed here reaches the window's bindings, which draw or quit.
+        window = str(self.history_query.winfo_toplevel())
+        self.history_query.bindtags(
+            tuple(tag for tag in self.history_query.bindtags() if tag != window)
+        )
+        self.history_query.bind("<KeyRelease>", self.query_history)
+        self.history_result = tk.Label(query_frame, anchor=tk.W)
+        self.history_result.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        scrollbar = tk.Scrollbar(self.history_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.history_list = tk.Listbox(
+            self.history_frame, height=5, yscrollcommand=scrollbar.set
+        )
+        self.history_list.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        scrollbar.config(command=self.history_list.yview)
+
+    def show_history(self, visible):
+        if visible:
+            self.history_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        else:
+            self.history_frame.pack_forget()
+
+    def record_draw(self, num):
+        self.history.append(num)
+        # Only add the new draw to the list, never redraw it all
+        self.history_list.insert(0, "#%d: %s" % (self.history.total, num))
+        if self.history_list.size() > DRAW_HISTORY_SHOWN:
+            self.history_list.delete(DRAW_HISTORY_SHOWN, tk.END)
+        self.query_history()
+
+    def query_history(self, event=None):
+        text = self.history_query.get().strip()
+        if not text:
+            result = ""
+        else:
+            try:
+                num = int(text)
+            except ValueError:
+                result = "Not a number"
+            else:
+                found = self.history.lookup(num)
+                if found is None:
+                    result = "%s was not drawn" % num
+                else:
+                    result = "%s was drawn %s time(s), last as draw #%s" % (
+                        num,
+                        found[0],
+                        found[1],
+                    )
+        self.history_result.config(text=result)
+
+    def make_range(self):
+        return list(
+            range(
+                self.main_config.min_num,
+                self.main_config.max_num,
+                self.main_config.step_num,
+            )
         )
 
+    def set_main_config(self, main_config):
+        """Use main_config, with its bounds put in order so the range is never empty."""
+        self.main_config = main_config
+        low, high = sorted((main_config.min_num, main_config.max_num))
+        self.main_config.min_num = low
+        # The maximum is excluded, equal bounds would leave nothing to draw
+        self.main_config.max_num = max(high, low + 1)
+        self.range = self.make_range()
+
+    def stop(self):
+        if self.pause_timer is not None:
+            self.after_cancel(self.pause_timer)
+            self.pause_timer = None
+        self.timeline = None
+        self.draw_queue.clear()
+
     def num_ask(self):
         question = "Please enter the desired coefficient for number selection. A lower value means numbers are unveiled faster\nInteger >= 1"
-        n = Ask_Num_Dialog(self, question, self.main_config.suspensefulness)
+        n = Ask_Num_Dialog(
+            self.ui, question, self.main_config.suspensefulness, title=self.name
+        )
         if n.result is not None:
             self.main_config.suspensefulness = n.result
-            self.write_configuration()
+            self.ui.write_configuration()
 
     def range_ask(self, question=None):
         """Ask for the desired range for random numbers."""
         if question is None:
             question = "Please enter the desired range and the step size for incrementing. The maximum range is exclusive."
         d = Range_Dialog(
-            self,
+            self.ui,
             question,
             (
                 self.main_config.min_num,
                 self.main_config.max_num,
                 self.main_config.step_num,
             ),
+            title=self.name,
         )
         if d.result is not None:
             res = d.result
 
+            self.main_config.min_num = res[0]
+            self.main_config.max_num = res[1]
             self.main_config.step_num = res[2]
-            self.main_config.max_num = max(res[0], res[1])
-            self.main_config.min_num = min(res[0], res[1])
-            self.range = self.make_range()
-            self.write_configuration()
+            # Puts the bounds in order
+            self.set_main_config(self.main_config)
+            self.ui.write_configuration()
 
     def pick_random_number(self):
         logger.debug(
@@ -497,42 +1472,106 @@ class Roulette_UI(tk.Tk):
             max(self.range),
             self.main_config.step_num,
         )
-        self.num = choice(self.range)
+        return choice(self.range)
 
     def show_random(self, event=None):
-        """Pick a new random number and start the picking animation."""
-        duration_since_last_show_random = time.time() - self.last_show_random_time
-        if duration_since_last_show_random < SHOW_RANDOM_DEBOUNCE_TIME_SEC:
-            logger.debug(
-                "Debouncing show_random for %s more seconds to avoid excessive tkinter/pyaudio events",
-                duration_since_last_show_random,
+        """Pick a new random number and start the picking animation.
+
+        If a number is being unveiled, the new number is queued instead.
+        """
+        # ENTER and SPACE now draw on this roulette
+        self.ui.active_panel = self
+        if self.drawing and len(self.draw_queue) >= DRAW_QUEUE_SIZE:
+            logger.warning(
+                "Draw queue is full (%s draws waiting), ignoring request",
+                len(self.draw_queue),
             )
+            self.bell()
+            return
+
+        num = self.pick_random_number()
+        if self.drawing:
+            self.draw_queue.append(num)
+            logger.info("Queued draw, %s draws waiting", len(self.draw_queue))
+            self.update_go_button()
             return
-        self.pick_random_number()
-        self.callback_roll_nums()
-        self.last_show_random_time = time.time()
+        self.start_draw(num)
+
+    def start_draw(self, num):
+        self.num = num
+        self.drawing = True
+        self.recorded = False
+        self.update_go_button()
+        # Hurry up when many draws are waiting
+        if len(self.draw_queue) >= DRAW_QUEUE_RUSH_SIZE:
+            time_per_place = 1
+        else:
+            time_per_place = self.main_config.suspensefulness
+        self.num_canvas.delete(tk.ALL)
+        self.roll_nums(None, time_per_place=time_per_place)
+
+    def next_draw(self):
+        if self.draw_queue:
+            self.start_draw(self.draw_queue.popleft())
+        else:
+            self.drawing = False
+            self.update_go_button()
+
+    def update_go_button(self):
+        if len(self.draw_queue) >= DRAW_QUEUE_SIZE:
+            self.but_go.config(state=tk.DISABLED)
+        else:
+            self.but_go.config(state=tk.NORMAL)
 
     def on_single_digit_selected(self, char, index, digit, digits):
         logger.debug("clank! %s", char)
         if index == 0:
             logger.debug("DING! %s", char)
-            if self.main_config.play_sound_effect:
-                self.audio_player.play_sound("tada")
+            # Resizing the window replays the animation, only record a draw once
+            if self.drawing and not self.recorded:
+                self.recorded = True
+                self.record_draw(self.num)
+            if self.ui.main_config.play_sound_effect:
+                self.ui.audio_player.play_sound("tada")
+            # Show the number for a while, then unveil the next queued one.
+            # A restarted animation cancels this timer.
+            if len(self.draw_queue) >= DRAW_QUEUE_RUSH_SIZE:
+                pause = DRAW_QUEUE_RUSH_PAUSE_MS
+            else:
+                pause = DRAW_QUEUE_PAUSE_MS
+            self.pause_timer = self.after(pause, self.next_draw)
+
+    def apply_theme(self, theme):
+        self.num_canvas.itemconfig(
+            "rect", fill=theme.rect_fill, outline=theme.rect_outline
+        )
+        self.num_canvas.itemconfig("digit", fill=theme.digit)
+
+    def get_digit_layout(self, num_places):
+        key = (self.num_canvas_width, self.num_canvas_height, num_places)
+        # Least recently used first. Pop and reinsert, move_to_end is py3 only
+        layout = self.digit_layouts.pop(key, None)
+        if layout is None:
+            layout = DigitLayout(
+                self, self.num_canvas_width, self.num_canvas_height, num_places
+            )
+            if len(self.digit_layouts) >= DIGIT_LAYOUT_CACHE_SIZE:
+                self.digit_layouts.popitem(last=False)
+        self.digit_layouts[key] = layout
+        return layout
 
     def roll_nums(self, event=None, time_per_place=5):
-        """Unveil the numbers using the canvas at a pace of time_per_place.
+        """Start unveiling the number on the canvas at a pace of time_per_place.
 
+        The digits are drawn by animation_tick, from the window's shared timer.
         time_per_place - must be >0 and an integer
         """
-        if time_per_place <= 0:
-            time_per_place = 1
-        time_per_place = int(time_per_place)
-
-        # Clear the after() queue and the lists of element IDs
+        # Clear the pause timer and the lists of element IDs
         for e in self.canvas_rects + self.canvas_digits:
             self.num_canvas.delete(e)
-        for t in self.canvas_queue:
-            self.after_cancel(t)
+        if self.pause_timer is not None:
+            self.after_cancel(self.pause_timer)
+            self.pause_timer = None
         self.canvas_rects = []
         self.canvas_digits = []
 
@@ -541,128 +1580,68 @@ class Roulette_UI(tk.Tk):
             self.num_canvas_width = event.width
             self.num_canvas_height = event.height
 
-        # How many places? Make it an integer and give log a >0 value
-        mnum = max(abs(self.main_config.max_num), abs(self.main_config.min_num))
-        num_rects = int(log(mnum, 10)) + 1
-
-        # Make space for the dash
-        if (
-            self.main_config.min_num < 0
-            and int(log(abs(self.main_config.min_num), 10)) + 1 >= num_rects
-        ):
-            num_rects += 1
-        num_range = list(range(num_rects))
-
-        # Figure out the element dimensions, colors and position
-        rect_outline = 10
-        rect_w = self.num_canvas_width / num_rects - 5
-        rect_h = self.num_canvas_height - 2 * rect_outline
-        rect_ox = self.num_canvas_width / 2
-        rect_ox -= (num_rects * rect_w) / 2
-        rect_oy = 10
-
-        outline = self.complementary_color(self.button_fg)
-        bg = self.button_fg
-
-        # Draw background rects
-        for i in num_range:
-            # Center the rectangles and give them space between each other
-            x1, y1, x2, y2 = (
-                i * rect_w + rect_ox,
-                rect_h + rect_oy,
-                (i * rect_w) + rect_w + rect_ox,
-                rect_oy,
-            )
+        num_rects = count_places(self.main_config.min_num, self.main_config.max_num)
+        layout = self.get_digit_layout(num_rects)
+
+        theme = self.ui.theme
+
+        # Draw background rects. Tags let apply_theme recolor them in place.
+        for x1, y1, x2, y2 in layout.rects:
             rect = self.num_canvas.create_rectangle(
-                x1, y1, x2, y2, fill=bg, outline=outline, width=rect_outline
+                x1,
+                y1,
+                x2,
+                y2,
+                fill=theme.rect_fill,
+                outline=theme.rect_outline,
+                width=RECT_OUTLINE,
+                tags="rect",
             )
             self.canvas_rects.append(rect)
 
-        # Draw text. Pad smaller numbers with zeroes.
-        # E.g., if max_num = 999, num = 99, ns = "099"
-        ns = self._pad_string(str(abs(self.num)), "0", num_rects)
-        # Add the dash if it had one
-        if self.num < 0:
-            ns = "-" + ns[1:]
-
-        # Pick a font size
-        fontsize = -self.num_canvas_width / 3
-        font = ("Helvetica", int(fontsize))
-
-        # Draw a character on the ith rectangle
-        def draw_char(index, i, char="7", delete_after=-1, final=False):
-            # center the number
-            x1, y1 = i * rect_w + rect_ox, rect_h + rect_oy
-
-            x, y = x1 + rect_w / 2, y1 / 2
-
-            txt = self.num_canvas.create_text(x, y, text=char, font=font, fill="white")
-
-            # Ask tkinter to delete this character from the canvas after X ms
-            if delete_after > 0:
-                timed = self.num_canvas.after(delete_after, self.num_canvas.delete, txt)
-                self.canvas_queue.append(timed)
+        # One text item per place, its text changes as the animation runs
+        for x, y in layout.centers:
+            txt = self.num_canvas.create_text(
+                x, y, text="", font=layout.font, fill=theme.digit, tags="digit"
+            )
             self.canvas_digits.append(txt)
 
-            if final:
-                self.on_single_digit_selected(char, index, i, num_range)
-
-        # Start with the most significant place first
-        num_range.reverse()
-
-        # The time interval
-        # Use tkinter's after() queue to make the numbers whiz by cool.
-        del_time = time_per_place * 5
-        for index, i in enumerate(num_range):
-            # Loop from 0 to 9 'count' times
-            count = (i + 1) * 3 + int(time_per_place / 2)
-            cc = ns[i]
-
-            if cc == "-":
-                picked_int = 0
-            else:
-                picked_int = int(cc)
-
-            for j in list(range(0, 9)) * count + list(range(0, picked_int)):
-                # Add a new character after some time
-                # Callback = draw the countdown number
-
-                timed = self.num_canvas.after(
-                    del_time * count, draw_char, index, i, str(j), del_time, False
+        self.timeline = roll_timeline(self.num, num_rects, time_per_place)
+        # Index of the character shown in each place, in unveiling order
+        self.shown = [-1] * len(self.timeline.places)
+        self.animation_start = time.time()
+        self.ui.start_animation_tick()
+
+    def animation_tick(self, now):
+        """Show the characters due at time now. Return whether still unveiling."""
+        if self.timeline is None:
+            return False
+
+        timeline = self.timeline
+        elapsed = (now - self.animation_start) * 1000
+        unveiling = False
+        selected = []
+        for k, i in enumerate(timeline.places):
+            # A late tick skips the characters it missed
+            j = timeline.glyph_index(k, elapsed)
+            final = j == len(timeline.glyphs[k]) - 1
+            if j != self.shown[k]:
+                self.shown[k] = j
+                self.num_canvas.itemconfig(
+                    self.canvas_digits[i], text=timeline.glyphs[k][j] if j >= 0 else ""
                 )
-                self.canvas_queue.append(timed)
-                count += 1
-
-            # Draw the picked number
-            timed = self.num_canvas.after(
-                count * del_time, draw_char, index, i, cc, -1, True
-            )
-            self.canvas_queue.append(timed)
-
-    def callback_roll_nums(self):
-        # Callback functions take no args.
-        # This runs roll_nums and asks it to take some time in displaying each decimal place
-        # time in milliseconds
-        self.num_canvas.delete(tk.ALL)
-        self.roll_nums(None, time_per_place=self.main_config.suspensefulness)
-
-    def complementary_color(self, hex_string, max_places=6, prefix="#"):
-        """Find the complementary color of a hex color string.
-
-        Handles prefixes and places.
-        """
-        # max color - color = complementary color
-        max_color = self._pad_string("", "F", max_places)
-        comp = hex(int(max_color, 16) - int(hex_string[len(prefix) :], 16))
-        # apply the given prefix based format and remove python's hex formatting
-        return prefix + self._pad_string(comp[2:], "0", max_places)
+                if final:
+                    selected.append((k, i, timeline.glyphs[k][j]))
+            if not final:
+                unveiling = True
 
-    def _pad_string(self, string, prefix, max_length):
-        # pads a string with some substring as a prefix
-        if len(string) < max_length:
-            string = prefix + string
-            string = self._pad_string(string, prefix, max_length)
-        return string
+        if not unveiling:
+            self.timeline = None
+        # The first place in the timeline is selected last
+        digits = list(range(len(self.canvas_digits)))
+        for index, i, char in sorted(selected, reverse=True):
+            self.on_single_digit_selected(char, index, i, digits)
+        return unveiling
 
 
 # Class for dialog windows from the tkinter docs
@@ -709,6 +1688,10 @@ class Dialog(tk.Toplevel):
         box.pack()
 
     def ok(self, event=None):
+        if not self.validate():
+            self.initial_focus.focus_set()
+            return
+
         self.withdraw()
         self.update_idletasks()
 
@@ -720,6 +1703,9 @@ class Dialog(tk.Toplevel):
         self.parent.focus_set()
         self.destroy()
 
+    def validate(self):
+        return True
+
     def apply(self):
         pass
 
@@ -789,29 +1775,36 @@ class Range_Dialog(Dialog):
         self.e_step.insert(0, self.prev_range[2])
         self.e_step.grid(row=3, column=1)
 
+        self.error = tk.Label(master, fg="red", wraplength=256)
+        self.error.grid(row=4, columnspan=3)
+
         return self.e_start  # initial focus.
 
-    def apply(self):
+    def validate(self):
+        # Same checks as the configuration file, so saved values load cleanly
         try:
-            start = int(self.e_start.get())
-            end = int(self.e_end.get())
+            self.values = (
+                parse_configuration_value("min_num", self.e_start.get()),
+                parse_configuration_value("max_num", self.e_end.get()),
+                parse_configuration_value("step_num", self.e_step.get()),
+            )
+        except ValueError as error:
+            self.error.config(text=str(error))
+            return False
+        return True
 
-            try:
-                step = int(self.e_step.get())
-            except (ValueError, TypeError):
-                logger.info(
-                    "Setting step to 1. Couldn't convert e_step to int", exc_info=True
-                )
-                step = 1
-            self.result = start, end, step
-        except:  # pylint: disable=bare-except
-            self.result = None
+    def apply(self):
+        self.result = self.values
 
 
 class Ask_Num_Dialog(Dialog):
-    def __init__(self, parent, question=None, prev_num=0, title=None):
+    def __init__(
+        self, parent, question=None, prev_num=0, title=None, key="suspensefulness"
+    ):  # pylint: disable=too-many-arguments
         self.question = question
         self.prev_num = prev_num
+        # The configuration key checked for the number
+        self.key = key
         Dialog.__init__(self, parent, title)
 
     def body(self, master):
@@ -826,18 +1819,583 @@ class Ask_Num_Dialog(Dialog):
         self.e_num.insert(0, self.prev_num)
         self.e_num.grid(row=1, column=1)
 
+        self.error = tk.Label(master, fg="red", wraplength=256)
+        self.error.grid(row=2, columnspan=2)
+
         return self.e_num
 
+    def validate(self):
+        try:
+            self.value = parse_configuration_value(self.key, self.e_num.get())
+        except ValueError as error:
+            self.error.config(text=str(error))
+            return False
+        return True
+
     def apply(self):
+        self.result = self.value
+
+
+# Offline rendering of the rolling animation.
+# No display or font library is needed: characters come from a small bitmap
+# font that is scaled to the size Tk would draw them at.
+GLYPH_BITMAPS = {
+    "0": (" ### ", "#   #", "#  ##", "# # #", "##  #", "#   #", " ### "),
+    "1": ("  #  ", " ##  ", "  #  ", "  #  ", "  #  ", "  #  ", " ### "),
+    "2": (" ### ", "#   #", "    #", "   # ", "  #  ", " #   ", "#####"),
+    "3": ("#####", "   # ", "  #  ", "   # ", "    #", "#   #", " ### "),
+    "4": ("   # ", "  ## ", " # # ", "#  # ", "#####", "   # ", "   # "),
+    "5": ("#####", "#    ", "#### ", "    #", "    #", "#   #", " ### "),
+    "6": ("  ## ", " #   ", "#    ", "#### ", "#   #", "#   #", " ### "),
+    "7": ("#####", "    #", "   # ", "  #  ", " #   ", " #   ", " #   "),
+    "8": (" ### ", "#   #", "#   #", " ### ", "#   #", "#   #", " ### "),
+    "9": (" ### ", "#   #", "#   #", " ####", "    #", "   # ", " ##  "),
+    "-": ("     ", "     ", "     ", "#####", "     ", "     ", "     "),
+}
+
+EXPORT_FORMATS = ["png", "ppm", "gif"]
+EXPORT_HOLD_MS = 1500
+# Encoded GIF digit boxes each export worker remembers. The digits whiz
+# through the same few combinations, so most frames reuse an encoded box
+EXPORT_GIF_CACHE_SIZE = 256
+
+# Palette indices used for indexed frames (PNG and GIF).
+# GIF palettes must have a power of two entries.
+EXPORT_BG_INDEX = 0
+EXPORT_FILL_INDEX = 1
+EXPORT_OUTLINE_INDEX = 2
+EXPORT_DIGIT_INDEX = 3
+
+
+def hex_to_rgb(hex_string, prefix="#"):
+    value = int(hex_string[len(prefix) :], 16)
+    return bytearray([(value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF])
+
+
+def theme_palette(theme):
+    """List the RGB colors of a theme, in the order of the EXPORT_*_INDEX palette indices."""
+    return [
+        hex_to_rgb(theme.background),
+        hex_to_rgb(theme.rect_fill),
+        hex_to_rgb(theme.rect_outline),
+        hex_to_rgb(theme.digit),
+    ]
+
+
+_glyph_runs_cache = {}
+
+
+def glyph_runs(char, width, height):
+    """Scale a glyph bitmap to width x height pixels.
+
+    Returns, for each pixel row, a tuple of (x_start, x_end) runs to fill.
+    Results are cached per character and size.
+    """
+    key = (char, width, height)
+    runs = _glyph_runs_cache.get(key)
+    if runs is not None:
+        return runs
+
+    bitmap = GLYPH_BITMAPS[char]
+    src_h = len(bitmap)
+    src_w = len(bitmap[0])
+    src_rows = []
+    for row in bitmap:
+        row_runs = []
+        for sx, pixel in enumerate(row):
+            if pixel == " ":
+                continue
+            x0, x1 = sx * width // src_w, (sx + 1) * width // src_w
+            # Merge horizontally adjacent pixels into a single run
+            if row_runs and row_runs[-1][1] == x0:
+                x0 = row_runs.pop()[0]
+            row_runs.append((x0, x1))
+        src_rows.append(tuple(row_runs))
+
+    runs = tuple(src_rows[y * src_h // height] for y in range(height))
+    _glyph_runs_cache[key] = runs
+    return runs
+
+
+class FrameRenderer(
+    # Python 2 compatibility
+    object
+):  # pylint: disable=useless-object-inheritance
+    """Rasterise frames of the rolling animation into raw pixel buffers.
+
+    With indexed=True every pixel is one palette index, otherwise it is RGB.
+    The rectangles come from place_rects, like the DigitLayout of RoulettePanel.
+    """
+
+    def __init__(
+        self, timeline, num_places, width, height, palette, indexed=True
+    ):  # pylint: disable=too-many-arguments
+        self.width = width
+        self.height = height
+        self.palette = palette
+        self.indexed = indexed
+        self.bpp = 1 if indexed else 3
+
+        if indexed:
+            colors = [bytearray([index]) for index in range(len(palette))]
+        else:
+            colors = palette
+        self.bg_color = colors[EXPORT_BG_INDEX]
+        fill_color = colors[EXPORT_FILL_INDEX]
+        outline_color = colors[EXPORT_OUTLINE_INDEX]
+        self.digit_color = colors[EXPORT_DIGIT_INDEX]
+
+        rects = place_rects(width, height, num_places)
+        self.background = bytearray(self.bg_color * (width * height))
+        for x1, y1, x2, y2 in rects:
+            # Tk centers the outline on the rectangle's edges
+            half = RECT_OUTLINE / 2.0
+            self.fill_rect(
+                self.background,
+                x1 - half,
+                y1 - half,
+                x2 + half,
+                y2 + half,
+                outline_color,
+            )
+            self.fill_rect(
+                self.background, x1 + half, y1 + half, x2 - half, y2 - half, fill_color
+            )
+
+        # Tk draws the digits with a font that is width / 3 pixels tall,
+        # of which roughly 70% is the digit itself. Like DigitLayout, shrink
+        # the digits to fit inside the rectangles.
+        x1, y1, x2, y2 = rects[0]
+        fontsize = width / 3.0
+        self.glyph_h = max(1, int(min(fontsize * 0.7, y2 - y1 - 2 * RECT_OUTLINE)))
+        self.glyph_w = max(1, int(min(self.glyph_h * 0.6, x2 - x1 - 2 * RECT_OUTLINE)))
+
+        self.timeline = timeline
+        # Top left corner of the character in each decimal place
+        self.origins = [
+            (int((x1 + x2 - self.glyph_w) / 2.0), int((y1 + y2 - self.glyph_h) / 2.0))
+            for x1, y1, x2, y2 in rects
+        ]
+
+        # Only this part of the frame ever changes after the background is drawn
+        x0 = min(x for x, _ in self.origins)
+        y0 = min(y for _, y in self.origins)
+        self.glyph_box = (
+            max(0, x0),
+            max(0, y0),
+            min(width, max(x for x, _ in self.origins) + self.glyph_w),
+            min(height, y0 + self.glyph_h),
+        )
+
+    def fill_rect(
+        self, buf, x1, y1, x2, y2, color
+    ):  # pylint: disable=too-many-arguments
+        x1, x2 = max(0, int(x1)), min(self.width, int(x2))
+        y1, y2 = max(0, int(y1)), min(self.height, int(y2))
+        if x1 >= x2:
+            return
+        row = color * (x2 - x1)
+        for y in range(y1, y2):
+            start = (y * self.width + x1) * self.bpp
+            buf[start : start + len(row)] = row
+
+    def draw_glyph(self, buf, char, origin):
+        ox, oy = origin
+        bpp = self.bpp
+        for dy, row_runs in enumerate(glyph_runs(char, self.glyph_w, self.glyph_h)):
+            y = oy + dy
+            if not row_runs or y < 0 or y >= self.height:
+                continue
+            row_start = y * self.width
+            for x0, x1 in row_runs:
+                x0, x1 = max(0, ox + x0), min(self.width, ox + x1)
+                if x0 < x1:
+                    buf[
+                        (row_start + x0) * bpp : (row_start + x1) * bpp
+                    ] = self.digit_color * (x1 - x0)
+
+    def render(self, time_ms):
+        """Render the frame visible time_ms after the animation starts."""
+        buf = bytearray(self.background)
+        for char, origin in zip(self.timeline.frame(time_ms), self.origins):
+            if char:
+                self.draw_glyph(buf, char, origin)
+        return buf
+
+    def cells_box(self, first, last):
+        """Box of the characters of places first to last, both included."""
+        x1, y1, x2, y2 = self.glyph_box
+        return (
+            max(x1, self.origins[first][0]),
+            y1,
+            min(x2, self.origins[last][0] + self.glyph_w),
+            y2,
+        )
+
+    def crop(self, buf, box):
+        x1, y1, x2, y2 = box
+        cropped = bytearray()
+        for y in range(y1, y2):
+            start = y * self.width
+            cropped += buf[(start + x1) * self.bpp : (start + x2) * self.bpp]
+        return cropped
+
+
+def _png_chunk(tag, data):
+    crc = zlib.crc32(tag + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+
+def encode_png(pixels, width, height, palette):
+    """Encode a frame of palette indices as an 8-bit indexed PNG."""
+    stride = width
+    raw = bytearray()
+    for y in range(height):
+        # Filter type 0 (None) for every row
+        raw.append(0)
+        raw += pixels[y * stride : (y + 1) * stride]
+    palette = b"".join(bytes(color) for color in palette)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0))
+        + _png_chunk(b"PLTE", palette)
+        + _png_chunk(b"IDAT", zlib.compress(bytes(raw), 6))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+def encode_ppm(pixels, width, height):
+    """Encode a frame of RGB pixels as a binary PPM."""
+    return ("P6\n%d %d\n255\n" % (width, height)).encode("ascii") + bytes(pixels)
+
+
+def _gif_lzw(pixels, min_code_size):
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+    out = bytearray()
+    bit_buffer = 0
+    bit_count = 0
+
+    codes = {}
+    next_code = end_code + 1
+    code_size = min_code_size + 1
+
+    # Start with a clear code, as most decoders expect
+    bit_buffer |= clear_code << bit_count
+    bit_count += code_size
+
+    prefix = pixels[0]
+    for pixel in pixels[1:]:
+        key = (prefix << 8) | pixel
+        code = codes.get(key)
+        if code is not None:
+            prefix = code
+            continue
+
+        bit_buffer |= prefix << bit_count
+        bit_count += code_size
+        while bit_count >= 8:
+            out.append(bit_buffer & 0xFF)
+            bit_buffer >>= 8
+            bit_count -= 8
+
+        if next_code >= (1 << code_size) and code_size < 12:
+            code_size += 1
+        if next_code < 4095:
+            codes[key] = next_code
+            next_code += 1
+        else:
+            # The code table is full, start over
+            bit_buffer |= clear_code << bit_count
+            bit_count += code_size
+            codes = {}
+            next_code = end_code + 1
+            code_size = min_code_size + 1
+        prefix = pixel
+
+    # Flush the last prefix followed by the end code
+    bit_buffer |= prefix << bit_count
+    bit_count += code_size
+    if next_code >= (1 << code_size) and code_size < 12:
+        code_size += 1
+    bit_buffer |= end_code << bit_count
+    bit_count += code_size
+    while bit_count > 0:
+        out.append(bit_buffer & 0xFF)
+        bit_buffer >>= 8
+        bit_count -= 8
+    return out
+
+
+def encode_gif_frame(
+    pixels, width, height, delay_cs, left=0, top=0
+):  # pylint: disable=too-many-arguments
+    """Encode a frame of palette indices as a GIF image block with a delay.
+
+    The frame is drawn at (left, top) over the previous frame, which is kept.
+    """
+    return gif_control_block(delay_cs) + encode_gif_image(
+        pixels, width, height, left, top
+    )
+
+
+def gif_control_block(delay_cs):
+    # Disposal method 1: do not dispose of the previous frame
+    return b"\x21\xf9\x04\x04" + struct.pack("<H", delay_cs) + b"\x00\x00"
+
+
+def encode_gif_image(pixels, width, height, left=0, top=0):
+    """Encode palette indices as a GIF image, without its delay."""
+    min_code_size = 2
+    data = _gif_lzw(pixels, min_code_size)
+    block = bytearray(
+        b"\x2c" + struct.pack("<HHHH", left, top, width, height) + b"\x00"
+    )
+    block.append(min_code_size)
+    for start in range(0, len(data), 255):
+        sub_block = data[start : start + 255]
+        block.append(len(sub_block))
+        block += sub_block
+    block.append(0)
+    return bytes(block)
+
+
+def gif_header(width, height, palette):
+    # Global color table with 4 entries and 8 bit color resolution
+    header = b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF1, 0, 0)
+    return header + b"".join(bytes(color) for color in palette)
+
+
+# Each export worker process holds its own renderer
+_export_state = {}
+
+
+def _init_export_worker(renderer, fmt, fps, output):
+    _export_state.update(
+        renderer=renderer, fmt=fmt, fps=fps, output=output, gif_images={}
+    )
+
+
+def _export_frame(frame):
+    renderer = _export_state["renderer"]
+    fmt = _export_state["fmt"]
+    fps = _export_state["fps"]
+    time_ms = frame * 1000.0 / fps
+    if fmt == "gif":
+        delay_cs = int(round(100.0 * (frame + 1) / fps)) - int(
+            round(100.0 * frame / fps)
+        )
+        if frame == 0:
+            pixels = renderer.render(time_ms)
+            return encode_gif_frame(pixels, renderer.width, renderer.height, delay_cs)
+        # Later frames only redraw the characters that changed since the
+        # previous frame. Their pixels only depend on the characters.
+        chars = renderer.timeline.frame(time_ms)
+        previous = renderer.timeline.frame((frame - 1) * 1000.0 / fps)
+        changed = [i for i, char in enumerate(chars) if char != previous[i]] or [0]
+        key = (changed[0], changed[-1], tuple(chars[changed[0] : changed[-1] + 1]))
+        images = _export_state["gif_images"]
+        image = images.get(key)
+        if image is None:
+            box = renderer.cells_box(changed[0], changed[-1])
+            x1, y1, x2, y2 = box
+            image = encode_gif_image(
+                renderer.crop(renderer.render(time_ms), box), x2 - x1, y2 - y1, x1, y1
+            )
+            if len(images) < EXPORT_GIF_CACHE_SIZE:
+                images[key] = image
+        return gif_control_block(delay_cs) + image
+
+    pixels = renderer.render(time_ms)
+
+    if fmt == "png":
+        data = encode_png(pixels, renderer.width, renderer.height, renderer.palette)
+    else:
+        data = encode_ppm(pixels, renderer.width, renderer.height)
+    filename = join(_export_state["output"], "frame_%05d.%s" % (frame, fmt))
+    with open(filename, "wb") as framefile:
+        framefile.write(data)
+    return filename
+
+
+def export_animation(  # pylint: disable=too-many-arguments
+    output,
+    num,
+    num_places,
+    suspensefulness=DEFAULT_MAIN_CONFIG["suspensefulness"],
+    fmt="png",
+    width=800,
+    height=300,
+    fps=25,
+    processes=None,
+    theme=THEMES[DEFAULT_MAIN_CONFIG["theme"]],
+):
+    """Render the rolling animation for num without a display.
+
+    output - a directory for png and ppm frame sequences, or a .gif file
+    Frames are rendered in parallel by a pool of processes.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(
+            "Unknown export format %s, use one of %s" % (fmt, EXPORT_FORMATS)
+        )
+
+    timeline = roll_timeline(num, num_places, suspensefulness)
+    renderer = FrameRenderer(
+        timeline, num_places, width, height, theme_palette(theme), indexed=fmt != "ppm"
+    )
+    duration = timeline.duration + EXPORT_HOLD_MS
+    num_frames = int(duration * fps / 1000.0) + 1
+
+    # Frames go in the output directory, a GIF in its parent directory
+    directory = dirname(output) if fmt == "gif" else output
+    if directory and not exists(directory):
+        os.makedirs(directory)
+
+    logger.info(
+        "Exporting %s frames (%.2f s) of %s as %s to %s",
+        num_frames,
+        duration / 1000.0,
+        format_number(num, num_places),
+        fmt,
+        output,
+    )
+    start_time = time.time()
+    # pylint: disable=consider-using-with
+    pool = multiprocessing.Pool(
+        processes, _init_export_worker, (renderer, fmt, fps, output)
+    )
+    try:
+        # Frames are returned in order, GIF frames must be written in order
+        results = pool.imap(_export_frame, range(num_frames), chunksize=8)
+        if fmt == "gif":
+            with open(output, "wb") as giffile:
+                giffile.write(gif_header(width, height, renderer.palette))
+                for block in results:
+                    giffile.write(block)
+                giffile.write(b"\x3b")
+        else:
+            for _ in results:
+                pass
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    elapsed = time.time() - start_time
+    logger.info(
+        "Exported %s frames in %.2f s, %.1fx real time",
+        num_frames,
+        elapsed,
+        duration / 1000.0 / max(elapsed, 1e-6),
+    )
+    return num_frames
+
+
+def positive_int(text):
+    """Parse a command line integer that must be >= 1."""
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be an integer >= 1, not %r" % text)
+    return value
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--export",
+        metavar="PATH",
+        help="render the animation offline to a directory of frames or a .gif file instead of opening a window",
+    )
+    parser.add_argument(
+        "--format",
+        choices=EXPORT_FORMATS,
+        help="export format, guessed from PATH if not given",
+    )
+    parser.add_argument(
+        "--number", type=int, help="number to unveil, random if not given"
+    )
+    parser.add_argument("--min-num", type=int, default=DEFAULT_MAIN_CONFIG["min_num"])
+    parser.add_argument("--max-num", type=int, default=DEFAULT_MAIN_CONFIG["max_num"])
+    parser.add_argument(
+        "--step-num", type=positive_int, default=DEFAULT_MAIN_CONFIG["step_num"]
+    )
+    parser.add_argument(
+        "--suspensefulness",
+        type=positive_int,
+        default=DEFAULT_MAIN_CONFIG["suspensefulness"],
+    )
+    parser.add_argument(
+        "--theme",
+        default=DEFAULT_MAIN_CONFIG["theme"],
+        help="a built-in theme (%s) or a [%sNAME] section of the configuration file"
+        % (", ".join(THEMES), THEME_SECTION_PREFIX),
+    )
+    parser.add_argument("--width", type=positive_int, default=800)
+    parser.add_argument("--height", type=positive_int, default=300)
+    parser.add_argument("--fps", type=positive_int, default=25)
+    parser.add_argument(
+        "--processes",
+        type=positive_int,
+        help="number of render processes, one per CPU by default",
+    )
+    return parser.parse_args(argv)
+
+
+def load_export_theme(name):
+    """Find a theme by name, in the built-in themes and the configuration file."""
+    themes = THEMES
+    if name not in themes:
+        errors = []
+        config_object = RawConfigParser()
         try:
-            num = int(self.e_num.get())
-            self.result = num
-        except:  # pylint: disable=bare-except
-            self.result = None
+            config_object.read(get_configuration_filepath())
+        except Exception as error:  # pylint: disable=broad-except
+            errors.append("Could not read the configuration: %s" % error)
+        themes, _ = read_themes(config_object, errors)
+        for error in errors:
+            logger.warning("Configuration error: %s", error)
+    if name not in themes:
+        raise SystemExit("Unknown theme %s, use one of %s" % (name, ", ".join(themes)))
+    return themes[name]
+
+
+def export_main(args):
+    theme = load_export_theme(args.theme)
+    fmt = args.format
+    if fmt is None:
+        fmt = "gif" if args.export.lower().endswith(".gif") else "png"
+    min_num = min(args.min_num, args.max_num)
+    # The maximum is excluded, equal bounds would leave nothing to draw
+    max_num = max(args.min_num, args.max_num, min_num + 1)
+    num = args.number
+    if num is None:
+        num = choice(list(range(min_num, max_num, args.step_num)))
+    export_animation(
+        args.export,
+        num,
+        count_places(min(min_num, num), max(max_num, num)),
+        suspensefulness=args.suspensefulness,
+        fmt=fmt,
+        width=args.width,
+        height=args.height,
+        fps=args.fps,
+        processes=args.processes,
+        theme=theme,
+    )
 
 
 if __name__ == "__main__":
     logger.info("System information (uname): %s", platform.uname())
     logger.info("Python version: %s", sys.version)
-    roulette_ui = Roulette_UI("SC Roulette")
-    roulette_ui.run()
+    arguments = parse_arguments()
+    if arguments.export:
+        export_main(arguments)
+    else:
+        roulette_ui = Roulette_UI("SC Roulette")
+        roulette_ui.run()
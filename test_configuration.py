@@ -0,0 +1,78 @@
+import pytest
+
+from SCC_roulette import parse_configuration_value, set_ini_value
+
+
+def test_values_are_converted_to_their_type():
+    assert parse_configuration_value("suspensefulness", " 4 ") == 4
+    assert parse_configuration_value("min_num", "-10") == -10
+    assert parse_configuration_value("play_sound_effect", "Yes") is True
+    assert parse_configuration_value("play_sound_effect", "off") is False
+    assert parse_configuration_value("theme", " night ") == "night"
+
+
+def test_invalid_values_name_the_key_and_section():
+    with pytest.raises(ValueError) as error:
+        parse_configuration_value("step_num", "0", "roulette_2")
+    assert str(error.value) == "[roulette_2] step_num must be an integer >= 1, not '0'"
+    with pytest.raises(ValueError) as error:
+        parse_configuration_value("play_sound_effect", "maybe")
+    assert str(error.value) == "play_sound_effect must be true or false, not 'maybe'"
+    with pytest.raises(ValueError):
+        parse_configuration_value("max_num", "ten")
+
+
+def test_set_ini_value_replaces_only_the_key():
+    lines = [
+        "[main_config]\n",
+        "; profile = commented\n",
+        "theme = night\n",
+        "profile = old\n",
+        "\n",
+        "[profile:old]\n",
+        "profile = untouched\n",
+    ]
+    assert set_ini_value(lines, "main_config", "profile", "new") == [
+        "[main_config]\n",
+        "; profile = commented\n",
+        "theme = night\n",
+        "profile = new\n",
+        "\n",
+        "[profile:old]\n",
+        "profile = untouched\n",
+    ]
+    # The lines passed in are left as they were
+    assert lines[3] == "profile = old\n"
+
+
+def test_set_ini_value_understands_the_colon_separator():
+    lines = ["[main_config]\n", "Profile: old\n"]
+    assert set_ini_value(lines, "main_config", "profile", "") == [
+        "[main_config]\n",
+        "profile = \n",
+    ]
+
+
+def test_set_ini_value_adds_a_missing_key_to_its_section():
+    lines = ["[main_config]\n", "theme = night\n", "\n", "[roulette_2]\n"]
+    assert set_ini_value(lines, "main_config", "profile", "finals") == [
+        "[main_config]\n",
+        "theme = night\n",
+        "profile = finals\n",
+        "\n",
+        "[roulette_2]\n",
+    ]
+
+
+def test_set_ini_value_adds_a_missing_section():
+    lines = ["[roulette_2]\n", "max_num = 9"]
+    assert set_ini_value(lines, "main_config", "profile", "finals") == [
+        "[roulette_2]\n",
+        "max_num = 9\n",
+        "[main_config]\n",
+        "profile = finals\n",
+    ]
+    assert set_ini_value([], "main_config", "profile", "") == [
+        "[main_config]\n",
+        "profile = \n",
+    ]
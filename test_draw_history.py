@@ -0,0 +1,31 @@
+from SCC_roulette import DrawHistory
+
+
+def test_lookup_counts_draws_and_last_serial():
+    history = DrawHistory(capacity=8)
+    for num in [5, 7, 5]:
+        history.append(num)
+    assert history.lookup(5) == (2, 3)
+    assert history.lookup(7) == (1, 2)
+    assert history.lookup(6) is None
+    assert history.last(5) == [5, 7, 5]
+
+
+def test_oldest_draws_are_forgotten():
+    history = DrawHistory(capacity=3)
+    for num in range(5):
+        history.append(num)
+    assert len(history) == 3
+    assert history.last(10) == [4, 3, 2]
+    assert 1 not in history
+    assert history.lookup(2) == (1, 3)
+
+
+def test_numbers_outside_the_c_long_range():
+    history = DrawHistory(capacity=2)
+    big = [2**63, -(2**63) - 1, 3000000000, 10**30]
+    for num in big:
+        history.append(num)
+    assert history.last(2) == [10**30, 3000000000]
+    assert history.lookup(3000000000) == (1, 3)
+    assert 2**63 not in history
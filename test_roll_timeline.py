@@ -0,0 +1,92 @@
+import pytest
+
+from SCC_roulette import ROLL_TIMELINE_CACHE_SIZE, format_number, roll_timeline
+
+
+def reference_schedule(num, num_places, time_per_place):
+    """The draw times of each character, computed like the original animation.
+
+    Each place starts after count intervals and draws its next character one
+    interval later, until the picked character.
+    """
+    time_per_place = max(1, int(time_per_place))
+    ns = format_number(num, num_places)
+    del_time = time_per_place * 5
+    schedule = []
+    for i in reversed(range(num_places)):
+        count = (i + 1) * 3 + int(time_per_place / 2)
+        cc = ns[i]
+        picked_int = 0 if cc == "-" else int(cc)
+        events = []
+        for j in list(range(0, 9)) * count + list(range(0, picked_int)):
+            events.append((del_time * count, str(j)))
+            count += 1
+        events.append((count * del_time, cc))
+        schedule.append((i, events))
+    return schedule
+
+
+CASES = [
+    (417, 4, 3),
+    (0, 1, 1),
+    (-999, 4, 5),
+    (5, 3, 2),
+    (123456, 7, 8),
+    (-7, 2, 0),
+]
+
+
+@pytest.mark.parametrize("num,num_places,time_per_place", CASES)
+def test_events_match_the_original_arithmetic(num, num_places, time_per_place):
+    timeline = roll_timeline(num, num_places, time_per_place)
+    schedule = reference_schedule(num, num_places, time_per_place)
+    assert timeline.places == tuple(i for i, _ in schedule)
+    for k, (_, events) in enumerate(schedule):
+        assert timeline.events(k) == events
+
+
+@pytest.mark.parametrize("num,num_places,time_per_place", CASES)
+def test_frames_show_the_last_character_drawn(num, num_places, time_per_place):
+    timeline = roll_timeline(num, num_places, time_per_place)
+    schedule = reference_schedule(num, num_places, time_per_place)
+    last = max(events[-1][0] for _, events in schedule)
+    assert timeline.duration == last
+    for time_ms in range(0, last + 2 * timeline.del_time, 7):
+        expected = [""] * num_places
+        for k, (i, events) in enumerate(schedule):
+            drawn = [char for offset, char in events if offset <= time_ms]
+            assert timeline.glyph_index(k, time_ms) == len(drawn) - 1
+            if drawn:
+                expected[i] = drawn[-1]
+        assert timeline.frame(time_ms) == expected
+    assert "".join(timeline.frame(last)) == format_number(num, num_places)
+
+
+def test_the_least_significant_place_is_unveiled_last():
+    timeline = roll_timeline(417, 4, 3)
+    assert timeline.places == (3, 2, 1, 0)
+    unveiled_at = [timeline.events(k)[-1][0] for k in range(4)]
+    assert unveiled_at[0] == max(unveiled_at)
+    assert unveiled_at[-1] == min(unveiled_at)
+
+
+def test_timelines_are_memoised():
+    timeline = roll_timeline(417, 4, 3)
+    assert roll_timeline(417, 4, 3) is timeline
+    assert roll_timeline(417, 4, 3.7) is timeline
+    assert roll_timeline(417, 4, 4) is not timeline
+    assert roll_timeline(417, 5, 3) != timeline
+
+
+def test_the_least_recently_used_timeline_is_evicted():
+    first = roll_timeline(1, 1, 1)
+    others = []
+    for num in range(2, ROLL_TIMELINE_CACHE_SIZE + 1):
+        others.append(roll_timeline(num, 3, 1))
+        # Keep the first timeline in use
+        assert roll_timeline(1, 1, 1) is first
+    # The cache is full, the next timeline evicts the oldest unused one
+    roll_timeline(-1, 3, 1)
+    assert roll_timeline(1, 1, 1) is first
+    assert roll_timeline(2, 3, 1) is not others[0]
+    assert roll_timeline(2, 3, 1) == others[0]